@@ -1,29 +1,58 @@
 # domain_models.py
 
+from bisect import bisect_right
+from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, List, Optional
+
+
+def cents_to_dollars(cents: Optional[int]) -> Optional[Decimal]:
+    """Converts a price in whole cents to an exact dollar amount."""
+    if cents is None:
+        return None
+    return Decimal(cents).scaleb(-2)
 
 
 class Customer:
     """Represents a customer with an optional loyalty account."""
 
+    __slots__ = ('id', 'name', 'email', 'loyalty_account')
+
     def __init__(self, id: int, name: Optional[str], email: Optional[str]):
         self.id: int = id
         self.name: Optional[str] = name
         self.email: Optional[str] = email
         self.loyalty_account: Optional[LoyaltyAccount] = None
 
+    @classmethod
+    def from_orm(cls, model: Any) -> 'Customer':
+        """
+        Builds a customer from an ORM model or a result row with matching
+        attributes.
+        """
+        return cls(model.id, model.name, model.email)
+
 
 class LoyaltyAccount:
     """Represents a loyalty account associated with a customer."""
 
+    __slots__ = ('id', 'customer', 'points', 'transactions')
+
     def __init__(self, id: int, customer: Customer, points: int = 0):
         self.id: int = id
         self.customer: Customer = customer
         self.points: int = points
         self.transactions: List[PointTransaction] = []
 
+    @classmethod
+    def from_orm(cls, model: Any, customer: Customer) -> 'LoyaltyAccount':
+        """
+        Builds a loyalty account for a customer from an ORM model or a
+        result row with matching attributes.
+        """
+        return cls(model.id, customer, model.points)
+
     def add_points(self, points: int) -> None:
         """Adds points to the loyalty account."""
         self.points += points
@@ -36,68 +65,125 @@ class LoyaltyAccount:
 class Product:
     """Represents a product with optional category and pricing information."""
 
-    def __init__(self, id: int, name: Optional[str], price: Optional[Decimal],
+    __slots__ = ('id', 'name', 'price_cents', 'category', 'category_id',
+                 'image_url')
+
+    def __init__(self, id: int, name: Optional[str],
+                 price_cents: Optional[int],
                  category: Optional['Category'], category_id: Optional[int],
                  image_url: Optional[str]):
         self.id: int = id
         self.name: Optional[str] = name
-        self.price: Optional[Decimal] = price
+        self.price_cents: Optional[int] = price_cents
         self.category: Optional['Category'] = category
         self.category_id: Optional[int] = category_id
         self.image_url: Optional[str] = image_url
 
+    @classmethod
+    def from_orm(cls, model: Any,
+                 category: Optional['Category']) -> 'Product':
+        """
+        Builds a product in a category from an ORM model or a result row
+        with matching attributes.
+        """
+        return cls(model.id, model.name, model.price_cents, category,
+                   model.category_id, model.image_url)
+
+    @property
+    def price(self) -> Optional[Decimal]:
+        """Returns the price in dollars, for display."""
+        return cents_to_dollars(self.price_cents)
+
 
 class Category:
     """Represents a product category with associated point earning rules."""
 
+    __slots__ = ('id', 'name', 'point_earning_rules', '_starts', '_ends',
+                 '_latest_end')
+
     def __init__(self, id: Optional[int], name: Optional[str]):
         self.id: Optional[int] = id
         self.name: Optional[str] = name
         self.point_earning_rules: List[PointEarningRule] = []
+        # Start and end dates of point_earning_rules, kept in the same
+        # start-date order so lookups can bisect instead of scanning.
+        # Open-ended dates are stored as date.min and date.max.
+        self._starts: List[date] = []
+        self._ends: List[date] = []
+        # No rule is active after this date, or at all if there are no rules
+        self._latest_end: date = date.min
+
+    @classmethod
+    def from_orm(cls, model: Any) -> 'Category':
+        """
+        Builds a category without rules from an ORM model or a result row
+        with matching attributes.
+        """
+        return cls(model.id, model.name)
 
     def add_point_earning_rule(self, rule: 'PointEarningRule') -> None:
-        """Adds a point earning rule to the category."""
-        self.point_earning_rules.append(rule)
+        """
+        Adds a point earning rule to the category, keeping the rules
+        sorted by start date.
+        """
+        start = rule.start_date or date.min
+        index = bisect_right(self._starts, start)
+        end = rule.end_date or date.max
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self.point_earning_rules.insert(index, rule)
+        self._latest_end = max(self._latest_end, end)
 
     def get_active_rule(self, date: date) -> Optional['PointEarningRule']:
         """
         Returns the active point earning rule for the category on a
-        given date.
+        given date. If several rules are active, the one that started
+        most recently is returned.
         """
-        for rule in self.point_earning_rules:
-            if (rule.start_date is None or rule.start_date <= date) and \
-               (rule.end_date is None or date <= rule.end_date):
-                return rule
+        if date > self._latest_end:
+            return None
+        index = bisect_right(self._starts, date)
+        while index:
+            index -= 1
+            if date <= self._ends[index]:
+                return self.point_earning_rules[index]
         return None
 
 
+@dataclass(frozen=True, slots=True)
 class PointEarningRule:
     """
     Defines a rule for earning points based on purchases in a
-    specificcategory.
+    specific category. Rules are immutable and hashable.
     """
 
-    def __init__(self, id: int, category: Category,
-                 points_per_dollar: Optional[int],
-                 start_date: Optional[date],
-                 end_date: Optional[date]):
-        self.id: int = id
-        self.category: Category = category
-        self.points_per_dollar: Optional[int] = points_per_dollar
-        self.start_date: Optional[date] = start_date
-        self.end_date: Optional[date] = end_date
+    id: int
+    category: Category
+    points_per_dollar: Optional[int]
+    start_date: Optional[date]
+    end_date: Optional[date]
 
+    @classmethod
+    def from_orm(cls, model: Any, category: Category) -> 'PointEarningRule':
+        """
+        Builds a rule for a category from an ORM model or a result row
+        with matching attributes.
+        """
+        return cls(model.id, category, model.points_per_dollar,
+                   model.start_date, model.end_date)
 
+
+@dataclass(frozen=True, slots=True)
 class PointTransaction:
-    """Represents a transaction where points are earned or spent."""
+    """
+    Represents a transaction where points are earned or spent.
+    Transactions are immutable once recorded.
+    """
 
-    def __init__(self, loyalty_account: LoyaltyAccount,
-                 product: Product, points_earned: int,
-                 transaction_date: date):
-        self.loyalty_account: LoyaltyAccount = loyalty_account
-        self.product: Product = product
-        self.points_earned: int = points_earned
-        self.transaction_date: date = transaction_date
+    loyalty_account: LoyaltyAccount
+    product: Product
+    points_earned: int
+    transaction_date: date
 
 
 class PointCalculator:
@@ -113,6 +199,26 @@ class PointCalculator:
         """
         if product.category is not None:
             rule = product.category.get_active_rule(transaction_date)
-            if rule and rule.points_per_dollar and product.price:
-                return int(product.price * rule.points_per_dollar)
+            return PointCalculator.calculate_points_for_rule(product, rule)
+        return 0
+
+    @staticmethod
+    def calculate_points_for_rule(product: Product,
+                                  rule: Optional[PointEarningRule]) -> int:
+        """
+        Calculates the points earned from a transaction based on the
+        product and an already resolved point earning rule.
+        """
+        if rule and rule.points_per_dollar and product.price_cents:
+            return PointCalculator.calculate_points_for_cents(
+                product.price_cents, rule.points_per_dollar)
         return 0
+
+    @staticmethod
+    def calculate_points_for_cents(price_cents: int,
+                                   points_per_dollar: int) -> int:
+        """
+        Calculates the points earned for a price given in whole cents,
+        using integer arithmetic only.
+        """
+        return price_cents * points_per_dollar // 100
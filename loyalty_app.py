@@ -1,22 +1,57 @@
 from flask import Flask, request, jsonify, render_template, Response
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from .domain_models import cents_to_dollars
 from .models import (db, Customers, Products)
+from decimal import Decimal
 import os
-from typing import List, Optional
+import sqlite3
+import time
+from typing import Any, List, NamedTuple, Optional, Tuple
 # Import the seed_database function
 from .seed_database import seed_database
 from .repositories import (CustomerRepository, LoyaltyAccountRepository,
-                           ProductRepository, PointTransactionRepository,
-                           CategoryRepository)
+                           ProductRepository, PointTransactionRepository)
 from .services import LoyaltyService
 
 app: Flask = Flask(__name__)
 # Set a secret key for session handling
 app.secret_key = os.environ.get('FLASK_SECRET_KEY')
 
+# Compile templates once: skip the per-render modification check and keep
+# compiled bytecode in the system temp directory across restarts
+app.config['TEMPLATES_AUTO_RELOAD'] = False
+app.jinja_env.auto_reload = False
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+app.jinja_env.get_template('index.html')
+
 # The SQLite database is located in the 'instance' folder
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///loyalty_program.db'
+# Keep enough pooled connections for a multi-threaded server, check them
+# before use and replace them every 30 minutes
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 20,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
 db.init_app(app)
 
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """
+    Use write-ahead logging on SQLite so readers are not blocked by a
+    checkout's write, and sync to disk only at WAL checkpoints.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+
 # Create the tables in the database if they don't exist and seed if necessary
 with app.app_context():
     try:
@@ -27,20 +62,75 @@ with app.app_context():
             seed_database(db)
             print("Database seeded successfully")
 
-        # Initialize repositories and service
-        customer_repo = CustomerRepository(db.session())
-        loyalty_account_repo = LoyaltyAccountRepository(db.session())
-        product_repo = ProductRepository(db.session())
-        transaction_repo = PointTransactionRepository(db.session())
-        category_repo = CategoryRepository(db.session())
+        # Initialize repositories and service. They share the scoped
+        # session, so each request (and thread) works in its own session.
+        customer_repo = CustomerRepository(db.session)
+        loyalty_account_repo = LoyaltyAccountRepository(db.session)
+        product_repo = ProductRepository(db.session)
+        transaction_repo = PointTransactionRepository(db.session)
 
         loyalty_service = LoyaltyService(
             customer_repo, loyalty_account_repo, product_repo,
-            transaction_repo, category_repo)
+            transaction_repo)
     except Exception as e:
         print(f"Database creation or seeding failed: {e}")
 
 
+class ProductListing(NamedTuple):
+    """The product fields shown on the index page."""
+    id: int
+    name: Optional[str]
+    price: Optional[Decimal]
+    image_url: Optional[str]
+
+
+# Products change rarely, so the index page reuses one loaded list. It is
+# dropped when a product is written through the ORM in this process, and
+# otherwise reloaded after PRODUCTS_CACHE_TTL seconds so that changes made
+# elsewhere (other workers, Core statements, SQL) still show up.
+PRODUCTS_CACHE_TTL = 60.0
+# (expiry time on the monotonic clock, cached list)
+_products_cache: Optional[Tuple[float, List[ProductListing]]] = None
+
+
+def _bust_products_cache(mapper: Any, connection: Any, target: Any) -> None:
+    """
+    Discard the cached product list after a product changes.
+    """
+    global _products_cache
+    _products_cache = None
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Products, _event_name, _bust_products_cache)
+
+
+def _get_product_listings() -> List[ProductListing]:
+    """
+    Return the products for the index page, from the cache if it is
+    still fresh.
+
+    Returns:
+        List[ProductListing]: Plain values, safe to share between threads
+        and requests.
+    """
+    global _products_cache
+    cached = _products_cache
+    now = time.monotonic()
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    rows = db.session.execute(select(
+        Products.id, Products.name, Products.price_cents, Products.image_url
+    ))
+    products = [
+        ProductListing(row.id, row.name, cents_to_dollars(row.price_cents),
+                       row.image_url)
+        for row in rows
+    ]
+    _products_cache = (now + PRODUCTS_CACHE_TTL, products)
+    return products
+
+
 @app.route('/')
 def index() -> str:
     """
@@ -51,7 +141,7 @@ def index() -> str:
     """
     customer_id = request.cookies.get('customer_id', None)
     if customer_id:
-        products: List[Products] = db.session.query(Products).all()
+        products = _get_product_listings()
         return render_template('index.html', products=products, logged_in=True,
                                customer_id=customer_id)
     else:
@@ -76,9 +166,10 @@ def login() -> Response:
     customer_id: str = request.json['customer_id']
     app.logger.debug(f"Attempting login for customer_id: {customer_id}")
 
-    customer: Optional[Customers] = db.session.query(
-        Customers).get(customer_id)
-    if customer:
+    customer_exists = db.session.scalar(select(
+        select(Customers.id).where(Customers.id == customer_id).exists()
+    ))
+    if customer_exists:
         response = jsonify({'success': True})
         response.set_cookie('customer_id', customer_id)
         app.logger.debug(f"Login successful for customer_id: {customer_id}")
@@ -120,8 +211,15 @@ def checkout() -> Response:
         return response
 
     customer_id: int = int(request.cookies['customer_id'])
-    product_ids: List[int] = request.json.get(
-        'product_ids', []) if request.json else []
+    # Decode the body once and reject anything but a list of integer IDs
+    payload = request.get_json(silent=True)
+    product_ids: Optional[List[int]] = payload.get(
+        'product_ids', []) if isinstance(payload, dict) else None
+    if not isinstance(product_ids, list) or not all(
+            type(product_id) is int for product_id in product_ids):
+        response = jsonify({"error": "Invalid product IDs"})
+        response.status_code = 400
+        return response
 
     response_data, status_code = loyalty_service.process_checkout(
         customer_id, product_ids)
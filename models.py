@@ -1,13 +1,29 @@
 # models.py
 
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey
+from sqlalchemy.orm import (
+    DeclarativeBase, Mapped, mapped_column, relationship
+)
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import (
+    ColumnElement, Integer, Numeric, String, Date, ForeignKey, Index,
+    type_coerce
+)
+from .domain_models import cents_to_dollars
 
-Base = declarative_base()
 
-db = SQLAlchemy(model_class=Base)
+class Base(DeclarativeBase):
+    pass
+
+
+# Objects keep their loaded state after a commit. Repositories copy what
+# they need into domain objects before committing, so nothing relies on
+# the refresh, and skipping it avoids a SELECT per object touched later.
+db = SQLAlchemy(model_class=Base,
+                session_options={'expire_on_commit': False})
 
 
 class Customers(Base):
@@ -22,11 +38,11 @@ class Customers(Base):
             loyalty account.
     """
     __tablename__ = 'Customers'
-    id = Column(Integer, primary_key=True)
-    name = Column(String(255))
-    email = Column(String(255))
-    loyalty_account = relationship(
-        'LoyaltyAccounts', uselist=False, back_populates='customer')
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String(255))
+    email: Mapped[Optional[str]] = mapped_column(String(255))
+    loyalty_account: Mapped[Optional['LoyaltyAccounts']] = relationship(
+        back_populates='customer')
 
 
 class LoyaltyAccounts(Base):
@@ -42,12 +58,14 @@ class LoyaltyAccounts(Base):
             associated with this account.
     """
     __tablename__ = 'LoyaltyAccounts'
-    id = Column(Integer, primary_key=True)
-    customer_id = Column(Integer, ForeignKey('Customers.id'))
-    points = Column(Integer, default=0)
-    customer = relationship('Customers', back_populates='loyalty_account')
-    transactions = relationship(
-        'PointTransactions', back_populates='loyalty_account')
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    customer_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey('Customers.id'))
+    points: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    customer: Mapped[Optional['Customers']] = relationship(
+        back_populates='loyalty_account')
+    transactions: Mapped[List['PointTransactions']] = relationship(
+        back_populates='loyalty_account')
 
 
 class PointTransactions(Base):
@@ -66,14 +84,17 @@ class PointTransactions(Base):
         product (Products): A relationship to the associated product.
     """
     __tablename__ = 'PointTransactions'
-    id = Column(Integer, primary_key=True)
-    loyalty_account_id = Column(Integer, ForeignKey('LoyaltyAccounts.id'))
-    product_id = Column(Integer, ForeignKey('Products.id'))
-    points_earned = Column(Integer)
-    transaction_date = Column(Date)
-    loyalty_account = relationship(
-        'LoyaltyAccounts', back_populates='transactions')
-    product = relationship('Products', back_populates='transactions')
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    loyalty_account_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey('LoyaltyAccounts.id'))
+    product_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey('Products.id'))
+    points_earned: Mapped[Optional[int]] = mapped_column(Integer)
+    transaction_date: Mapped[Optional[date]] = mapped_column(Date)
+    loyalty_account: Mapped[Optional['LoyaltyAccounts']] = relationship(
+        back_populates='transactions')
+    product: Mapped[Optional['Products']] = relationship(
+        back_populates='transactions')
 
 
 class Products(Base):
@@ -83,7 +104,9 @@ class Products(Base):
     Attributes:
         id (int): The primary key.
         name (str): The name of the product.
-        price (Numeric): The price of the product.
+        price_cents (int): The price of the product in cents.
+        price (Decimal): The price of the product in dollars, derived from
+            price_cents.
         category_id (int): Foreign key to the associated category.
         image_url (str): URL to the product's image.
         category (Categories): A relationship to the associated category.
@@ -91,13 +114,25 @@ class Products(Base):
         associated with this product.
     """
     __tablename__ = 'Products'
-    id = Column(Integer, primary_key=True)
-    name = Column(String(255))
-    price = Column(Numeric(10, 2))
-    category_id = Column(Integer, ForeignKey('Categories.id'))
-    image_url = Column(String(255))
-    category = relationship('Categories', back_populates='products')
-    transactions = relationship('PointTransactions', back_populates='product')
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String(255))
+    price_cents: Mapped[Optional[int]] = mapped_column(Integer)
+    category_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey('Categories.id'))
+    image_url: Mapped[Optional[str]] = mapped_column(String(255))
+    category: Mapped[Optional['Categories']] = relationship(
+        back_populates='products')
+    transactions: Mapped[List['PointTransactions']] = relationship(
+        back_populates='product')
+
+    @hybrid_property
+    def price(self) -> Optional[Decimal]:
+        return cents_to_dollars(self.price_cents)
+
+    @price.inplace.expression
+    @classmethod
+    def _price_expression(cls) -> ColumnElement[Decimal]:
+        return type_coerce(cls.price_cents / 100, Numeric())
 
 
 class Categories(Base):
@@ -109,14 +144,16 @@ class Categories(Base):
         name (str): The name of the category.
         products (list of Products): A list of products in this category.
         point_earning_rules (list of PointEarningRules): A list of point
-            earning rules associated with this category.
+            earning rules associated with this category, ordered by start
+            date.
     """
     __tablename__ = 'Categories'
-    id = Column(Integer, primary_key=True)
-    name = Column(String(255))
-    products = relationship('Products', back_populates='category')
-    point_earning_rules = relationship(
-        'PointEarningRules', back_populates='category')
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String(255))
+    products: Mapped[List['Products']] = relationship(
+        back_populates='category')
+    point_earning_rules: Mapped[List['PointEarningRules']] = relationship(
+        back_populates='category', order_by='PointEarningRules.start_date')
 
 
 class PointEarningRules(Base):
@@ -133,9 +170,15 @@ class PointEarningRules(Base):
         category (Categories): A relationship to the associated category.
     """
     __tablename__ = 'PointEarningRules'
-    id = Column(Integer, primary_key=True)
-    category_id = Column(Integer, ForeignKey('Categories.id'))
-    points_per_dollar = Column(Integer)
-    start_date = Column(Date)
-    end_date = Column(Date)
-    category = relationship('Categories', back_populates='point_earning_rules')
+    # Serves the active rule lookup by category and date range
+    __table_args__ = (
+        Index('ix_rule_cat_dates', 'category_id', 'start_date', 'end_date'),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    category_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey('Categories.id'))
+    points_per_dollar: Mapped[Optional[int]] = mapped_column(Integer)
+    start_date: Mapped[Optional[date]] = mapped_column(Date)
+    end_date: Mapped[Optional[date]] = mapped_column(Date)
+    category: Mapped[Optional['Categories']] = relationship(
+        back_populates='point_earning_rules')
@@ -1,7 +1,11 @@
 # repositories.py
 
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Union
+from sqlalchemy import and_, insert, lambda_stmt, or_, select, update
+from sqlalchemy.orm import (
+    Session, contains_eager, joinedload, raiseload, scoped_session
+)
+from sqlalchemy.sql.elements import ColumnElement
 from .models import (
     Customers, LoyaltyAccounts, Products, Categories,
     PointEarningRules, PointTransactions
@@ -13,17 +17,37 @@ from .domain_models import (
 from datetime import date
 
 
+def _rule_active_on(transaction_date: date) -> ColumnElement[bool]:
+    """
+    Builds the filter for point earning rules active on a given date.
+    Rules without a start or end date are open-ended.
+
+    Args:
+        transaction_date (date): The date the rules must be active on.
+
+    Returns:
+        ColumnElement[bool]: The filter expression.
+    """
+    return and_(
+        or_(PointEarningRules.start_date.is_(None),
+            PointEarningRules.start_date <= transaction_date),
+        or_(PointEarningRules.end_date.is_(None),
+            PointEarningRules.end_date >= transaction_date)
+    )
+
+
 class CustomerRepository:
     """
     Repository for performing database operations on the Customers table.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, scoped_session[Any]]):
         """
         Initializes the CustomerRepository with a database session.
 
         Args:
-            session (Session): The database session.
+            session (Union[Session, scoped_session]): The database session
+                or a scoped session proxy.
         """
         self.session = session
 
@@ -37,13 +61,13 @@ class CustomerRepository:
         Returns:
             Optional[Customer]: The retrieved customer or None if not found.
         """
-        customer_model = self.session.query(Customers).get(customer_id)
-        if customer_model:
-            return Customer(
-                customer_model.id,
-                customer_model.name,
-                customer_model.email
-            )
+        # Read-only: fetch plain column values, no ORM instance
+        row = self.session.execute(
+            select(Customers.id, Customers.name, Customers.email)
+            .where(Customers.id == customer_id)
+        ).first()
+        if row:
+            return Customer.from_orm(row)
         return None
 
 
@@ -52,12 +76,13 @@ class LoyaltyAccountRepository:
     Repository for performing database operations on the LoyaltyAccounts table.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, scoped_session[Any]]):
         """
         Initializes the LoyaltyAccountRepository with a database session.
 
         Args:
-            session (Session): The database session.
+            session (Union[Session, scoped_session]): The database session
+                or a scoped session proxy.
         """
         self.session = session
 
@@ -73,33 +98,41 @@ class LoyaltyAccountRepository:
             Optional[LoyaltyAccount]: The retrieved loyalty account or None
             if not found.
         """
-        account_model = self.session.query(LoyaltyAccounts).filter_by(
-            customer_id=customer_id).first()
+        # A lambda statement is built and compiled once, then reused with
+        # only customer_id bound per call. Each account has one customer,
+        # so the plain inner join fills the relationship without
+        # duplicating rows. Lambda statements return untyped results, so
+        # the loaded model's type is declared here.
+        account_model: Optional[LoyaltyAccounts] = self.session.execute(
+            lambda_stmt(
+                lambda: select(LoyaltyAccounts).join(
+                    LoyaltyAccounts.customer
+                ).options(
+                    contains_eager(LoyaltyAccounts.customer), raiseload('*')
+                ).where(LoyaltyAccounts.customer_id == customer_id)
+            )).scalars().first()
         if account_model:
-            customer = Customer(
-                account_model.customer.id,
-                account_model.customer.name,
-                account_model.customer.email
-            )
-            account_id = int(account_model.id)
-            points = int(account_model.points)
-            return LoyaltyAccount(
-                account_id, customer, points
-            )
+            return LoyaltyAccount.from_orm(
+                account_model, Customer.from_orm(account_model.customer))
         return None
 
-    def update(self, loyalty_account: LoyaltyAccount) -> None:
+    def add_points(self, account_id: int, points: int) -> None:
         """
-        Updates a loyalty account in the database.
+        Adds points to a loyalty account's balance in the database. The
+        change is committed by the caller.
 
         Args:
-            loyalty_account (LoyaltyAccount): The loyalty account to update.
+            account_id (int): The ID of the loyalty account.
+            points (int): The number of points to add.
         """
-        account_model = self.session.query(
-            LoyaltyAccounts).get(loyalty_account.id)
-        if account_model:
-            account_model.points = loyalty_account.points
-            self.session.commit()
+        # Add on the database side rather than writing a balance read
+        # earlier, so concurrent checkouts cannot overwrite each other
+        if points:
+            self.session.execute(
+                update(LoyaltyAccounts)
+                .where(LoyaltyAccounts.id == account_id)
+                .values(points=LoyaltyAccounts.points + points)
+            )
 
 
 class ProductRepository:
@@ -107,12 +140,13 @@ class ProductRepository:
     Repository for performing database operations on the Products table.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, scoped_session[Any]]):
         """
         Initializes the ProductRepository with a database session.
 
         Args:
-            session (Session): The database session.
+            session (Union[Session, scoped_session]): The database session
+                or a scoped session proxy.
         """
         self.session = session
 
@@ -126,19 +160,63 @@ class ProductRepository:
         Returns:
             Optional[Product]: The retrieved product or None if not found.
         """
-        product_model = self.session.query(Products).get(product_id)
-        if product_model:
-            category = Category(product_model.category_id,
-                                product_model.category.name)
-            return Product(
-                product_model.id,
-                product_model.name,
-                product_model.price,
-                category,
-                product_model.category_id,
-                product_model.image_url
-            )
-        return None
+        return self.get_many([product_id]).get(product_id)
+
+    def get_many(self, product_ids: List[int],
+                 active_on: Optional[date] = None) -> Dict[int, Product]:
+        """
+        Retrieves several products with their categories and point earning
+        rules, using one query for the products and their categories and
+        one for all of their rules. Only column values are fetched; no ORM
+        instances are built.
+
+        Args:
+            product_ids (List[int]): The IDs of the products to retrieve.
+            active_on (Optional[date]): If given, only the rules active on
+                this date are loaded.
+
+        Returns:
+            Dict[int, Product]: The retrieved products keyed by ID. IDs that
+            do not match a product are absent from the result.
+        """
+        if not product_ids:
+            return {}
+        product_rows = self.session.execute(
+            select(
+                Products.id, Products.name, Products.price_cents,
+                Products.category_id, Products.image_url,
+                Categories.id.label('category_pk'),
+                Categories.name.label('category_name')
+            ).outerjoin(
+                Categories, Products.category_id == Categories.id
+            ).where(Products.id.in_(product_ids))
+        ).all()
+
+        categories: Dict[int, Category] = {}
+        for row in product_rows:
+            if row.category_pk is not None:
+                categories[row.category_pk] = Category(
+                    row.category_pk, row.category_name)
+
+        if categories:
+            rule_query = select(
+                PointEarningRules.id, PointEarningRules.category_id,
+                PointEarningRules.points_per_dollar,
+                PointEarningRules.start_date, PointEarningRules.end_date
+            ).where(
+                PointEarningRules.category_id.in_(list(categories))
+            ).order_by(PointEarningRules.start_date)
+            if active_on is not None:
+                rule_query = rule_query.where(_rule_active_on(active_on))
+            for rule_row in self.session.execute(rule_query):
+                category = categories[rule_row.category_id]
+                category.add_point_earning_rule(
+                    PointEarningRule.from_orm(rule_row, category))
+
+        return {
+            row.id: Product.from_orm(row, categories.get(row.category_pk))
+            for row in product_rows
+        }
 
 
 class CategoryRepository:
@@ -146,46 +224,49 @@ class CategoryRepository:
     Repository for performing database operations on the Categories table.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, scoped_session[Any]]):
         """
         Initializes the CategoryRepository with a database session.
 
         Args:
-            session (Session): The database session.
+            session (Union[Session, scoped_session]): The database session
+                or a scoped session proxy.
         """
         self.session = session
 
-    def get_by_id(self, category_id: Optional[int]) -> Optional[Category]:
+    def get_by_id(self, category_id: Optional[int],
+                  for_date: Optional[date] = None) -> Optional[Category]:
         """
-        Retrieves a category by its ID.
+        Retrieves a category by its ID, along with the point earning rule
+        active on a given date.
 
         Args:
             category_id (Optional[int]): The ID of the category to retrieve.
+            for_date (Optional[date]): The date the rule must be active on.
+                Defaults to today.
 
         Returns:
             Optional[Category]: The retrieved category or None if not found.
         """
-        category_model = self.session.query(Categories).get(category_id)
-        if category_model:
-            category = Category(category_model.id, category_model.name)
-            # Look up the applicable PointEarningRule for that category
-            # Assuming for now only the latest rule is applicable
-            point_earning_rule_model = self.session.query(
-                PointEarningRules
-            ).filter_by(
-                category_id=category.id
-            ).order_by(
-                PointEarningRules.start_date.desc()
-            ).first()
-            if point_earning_rule_model:
-                rule = PointEarningRule(
-                    point_earning_rule_model.id,
-                    category,
-                    point_earning_rule_model.points_per_dollar,
-                    point_earning_rule_model.start_date,
-                    point_earning_rule_model.end_date
-                )
-                category.add_point_earning_rule(rule)
+        # One round trip: the category outer-joined to its active rules,
+        # most recently started first
+        row = self.session.query(Categories, PointEarningRules).outerjoin(
+            PointEarningRules,
+            and_(PointEarningRules.category_id == Categories.id,
+                 _rule_active_on(for_date or date.today()))
+        ).options(
+            raiseload('*')
+        ).filter(
+            Categories.id == category_id
+        ).order_by(
+            PointEarningRules.start_date.desc()
+        ).first()
+        if row:
+            category_model, rule_model = row
+            category = Category.from_orm(category_model)
+            if rule_model:
+                category.add_point_earning_rule(
+                    PointEarningRule.from_orm(rule_model, category))
             return category
         return None
 
@@ -196,30 +277,57 @@ class PointTransactionRepository:
     PointTransactions table.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, scoped_session[Any]]):
         """
         Initializes the PointTransactionRepository with a database session.
 
         Args:
-            session (Session): The database session.
+            session (Union[Session, scoped_session]): The database session
+                or a scoped session proxy.
         """
         self.session = session
 
     def create(self, transaction: PointTransaction) -> None:
         """
-        Creates a new point transaction in the database.
+        Creates a new point transaction in the database. The change is
+        committed by the caller.
 
         Args:
             transaction (PointTransaction): The transaction to create.
         """
-        transaction_model = PointTransactions(
-            loyalty_account_id=transaction.loyalty_account.id,
-            product_id=transaction.product.id,
-            points_earned=transaction.points_earned,
-            transaction_date=transaction.transaction_date
-        )
-        self.session.add(transaction_model)
-        self.session.commit()
+        self.session.add(PointTransactions(**self._to_row(transaction)))
+
+    def create_many(self, transactions: List[PointTransaction]) -> None:
+        """
+        Creates several point transactions in the database with one
+        executemany INSERT. The changes are committed by the caller.
+
+        Args:
+            transactions (List[PointTransaction]): The transactions to create.
+        """
+        if transactions:
+            self.session.execute(
+                insert(PointTransactions),
+                [self._to_row(transaction) for transaction in transactions]
+            )
+
+    def _to_row(self, transaction: PointTransaction) -> Dict[str, Any]:
+        """
+        Builds the column values of a point transaction row from a domain
+        transaction.
+
+        Args:
+            transaction (PointTransaction): The transaction to convert.
+
+        Returns:
+            Dict[str, Any]: The column values keyed by attribute name.
+        """
+        return {
+            'loyalty_account_id': transaction.loyalty_account.id,
+            'product_id': transaction.product.id,
+            'points_earned': transaction.points_earned,
+            'transaction_date': transaction.transaction_date
+        }
 
 
 class PointEarningRuleRepository:
@@ -228,38 +336,48 @@ class PointEarningRuleRepository:
     PointEarningRules table.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, scoped_session[Any]]):
         """
         Initializes the PointEarningRuleRepository with a database session.
 
         Args:
-            session (Session): The database session.
+            session (Union[Session, scoped_session]): The database session
+                or a scoped session proxy.
         """
         self.session = session
 
-    def get_active_rule(self, category_id: int,
-                        transaction_date: date) -> Optional[PointEarningRule]:
+    def get_active_rule(
+        self, category_id: int, transaction_date: date,
+        category: Optional[Category] = None
+    ) -> Optional[PointEarningRule]:
         """
         Retrieves the active point earning rule for a category on a given date.
+        Rules without a start or end date are open-ended. If several rules
+        are active, the one that started most recently is returned.
 
         Args:
             category_id (int): The ID of the category.
             transaction_date (date): The date for which the rule is applicable.
+            category (Optional[Category]): The domain category to attach the
+                rule to. Loaded from the database if omitted.
 
         Returns:
             Optional[PointEarningRule]: The active rule or None if not found.
         """
-        rule_model = self.session.query(PointEarningRules).filter(
-            PointEarningRules.category_id == category_id,
-            PointEarningRules.start_date <= transaction_date,
-            PointEarningRules.end_date >= transaction_date
-        ).first()
+        rule_model: Optional[PointEarningRules] = self.session.execute(
+            lambda_stmt(
+                lambda: select(PointEarningRules).options(
+                    joinedload(PointEarningRules.category), raiseload('*')
+                ).where(
+                    PointEarningRules.category_id == category_id,
+                    _rule_active_on(transaction_date)
+                ).order_by(
+                    PointEarningRules.start_date.desc()
+                ).limit(1)
+            )).scalars().first()
 
         if rule_model:
-            category = Category(rule_model.category.id,
-                                rule_model.category.name)
-            return PointEarningRule(int(rule_model.id), category,
-                                    rule_model.points_per_dollar,
-                                    rule_model.start_date,
-                                    rule_model.end_date)
+            if category is None:
+                category = Category.from_orm(rule_model.category)
+            return PointEarningRule.from_orm(rule_model, category)
         return None
@@ -1,13 +1,15 @@
 # services.py
 
-from typing import List, Dict, Any, Tuple
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import date
 from .domain_models import (
-    LoyaltyAccount, Product, PointTransaction, PointCalculator
+    LoyaltyAccount, Product, PointEarningRule, PointTransaction,
+    PointCalculator
 )
 from .repositories import (
     CustomerRepository, LoyaltyAccountRepository,
-    ProductRepository, PointTransactionRepository, CategoryRepository
+    ProductRepository, PointTransactionRepository
 )
 
 
@@ -16,8 +18,7 @@ class LoyaltyService:
                  customer_repo: CustomerRepository,
                  loyalty_account_repo: LoyaltyAccountRepository,
                  product_repo: ProductRepository,
-                 transaction_repo: PointTransactionRepository,
-                 category_repo: CategoryRepository) -> None:
+                 transaction_repo: PointTransactionRepository) -> None:
         """
         Initializes the LoyaltyService with required repositories.
 
@@ -30,14 +31,11 @@ class LoyaltyService:
                 operations.
             transaction_repo (PointTransactionRepository): Repository for
                 transaction operations.
-            category_repo (CategoryRepository): Repository for category
-                operations.
         """
         self.customer_repo = customer_repo
         self.loyalty_account_repo = loyalty_account_repo
         self.product_repo = product_repo
         self.transaction_repo = transaction_repo
-        self.category_repo = category_repo
 
     def process_checkout(self, customer_id: int,
                          product_ids: List[int]) -> Tuple[Dict[str, Any], int]:
@@ -53,41 +51,55 @@ class LoyaltyService:
             Tuple[Dict[str, Any], int]: A tuple containing the response data
             and HTTP status code.
         """
-        customer = self.customer_repo.get_by_id(customer_id)
-        if not customer:
-            return {"error": "Customer not found"}, 404
-
-        loyalty_account = self.loyalty_account_repo.get_by_customer_id(
-            customer_id)
-        if not loyalty_account:
-            return {"error": "Loyalty account not found"}, 404
-
-        results = self._process_products(loyalty_account, product_ids)
-        (total_points_earned, invalid_products, products_missing_category,
-         point_earning_rules_missing) = results
-
-        self.loyalty_account_repo.update(loyalty_account)
-
-        response_data = {
-            "total_points_earned": total_points_earned,
-            "invalid_products": invalid_products,
-            "products_missing_category": products_missing_category,
-            "point_earning_rules_missing": point_earning_rules_missing
-        }
-
-        return response_data, 200
+        session = self.loyalty_account_repo.session
+        # The point transactions and the balance update commit together,
+        # or roll back together if anything raises. pysqlite only sends
+        # BEGIN before the first write, so the reads before it are not
+        # isolated; the balance is therefore updated by a delta.
+        with session.begin():
+            customer = self.customer_repo.get_by_id(customer_id)
+            if not customer:
+                return {"error": "Customer not found"}, 404
+
+            loyalty_account = self.loyalty_account_repo.get_by_customer_id(
+                customer_id)
+            if not loyalty_account:
+                return {"error": "Loyalty account not found"}, 404
+
+            # One checkout date for every rule lookup and transaction, even if
+            # the request straddles midnight
+            transaction_date = date.today()
+            results = self._process_products(
+                loyalty_account, product_ids, transaction_date)
+            (total_points_earned, invalid_products, products_missing_category,
+             point_earning_rules_missing) = results
+
+            self.loyalty_account_repo.add_points(
+                loyalty_account.id, total_points_earned)
+
+            response_data = {
+                "total_points_earned": total_points_earned,
+                "invalid_products": invalid_products,
+                "products_missing_category": products_missing_category,
+                "point_earning_rules_missing": point_earning_rules_missing
+            }
+
+            return response_data, 200
 
     def _process_products(
-        self, loyalty_account: LoyaltyAccount, product_ids: List[int]
+        self, loyalty_account: LoyaltyAccount, product_ids: List[int],
+        transaction_date: date
     ) -> Tuple[int, List[int], List[int], List[int]]:
         """
         Processes each product for checkout, calculating points
-        and handling transactions.
+        and handling transactions. Repeated product IDs are looked up
+        and priced once, then counted once per unit.
 
         Args:
             loyalty_account (LoyaltyAccount): The loyalty account
             of the customer.
             product_ids (List[int]): List of product IDs being purchased.
+            transaction_date (date): The date of the checkout.
 
         Returns:
             Tuple[int, List[int], List[int], List[int]]: A tuple containing
@@ -98,29 +110,44 @@ class LoyaltyService:
         invalid_products = []
         products_missing_category = []
         point_earning_rules_missing = []
-
-        for product_id in product_ids:
-            product = self.product_repo.get_by_id(product_id)
+        transactions: List[PointTransaction] = []
+        # Products in the same category share the active rule lookup
+        active_rules: Dict[Optional[int], Optional[PointEarningRule]] = {}
+
+        quantities = Counter(product_ids)
+        # Only the rules active on the transaction date are loaded
+        products = self.product_repo.get_many(
+            list(quantities), active_on=transaction_date)
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
             if not product:
                 invalid_products.append(product_id)
                 continue
 
-            # Fetch the category with rules using the CategoryRepository
-            product.category = self.category_repo.get_by_id(
-                product.category_id)
+            # The category and its rules are loaded along with the product
             if not product.category:
                 products_missing_category.append(product_id)
                 continue
 
-            points_earned = PointCalculator.calculate_points(
-                product, date.today())
+            category_id = product.category.id
+            if category_id not in active_rules:
+                active_rules[category_id] = product.category.get_active_rule(
+                    transaction_date)
+
+            points_earned = PointCalculator.calculate_points_for_rule(
+                product, active_rules[category_id])
             if points_earned == 0:
                 point_earning_rules_missing.append(product_id)
                 continue
 
-            self._create_transaction(loyalty_account, product, points_earned)
-            loyalty_account.add_points(points_earned)
-            total_points_earned += points_earned
+            # One transaction per unit purchased
+            transaction = self._create_transaction(
+                loyalty_account, product, points_earned, transaction_date)
+            transactions.extend([transaction] * quantity)
+            loyalty_account.add_points(points_earned * quantity)
+            total_points_earned += points_earned * quantity
+
+        self.transaction_repo.create_many(transactions)
 
         return (
             total_points_earned,
@@ -131,8 +158,8 @@ class LoyaltyService:
 
     def _create_transaction(
         self, loyalty_account: LoyaltyAccount, product: Product,
-        points_earned: int
-    ) -> None:
+        points_earned: int, transaction_date: date
+    ) -> PointTransaction:
         """
         Creates a point transaction for a product purchase.
 
@@ -141,11 +168,14 @@ class LoyaltyService:
                 of the customer.
             product (Product): The product being purchased.
             points_earned (int): The points earned from the purchase.
+            transaction_date (date): The date of the checkout.
+
+        Returns:
+            PointTransaction: The transaction to be saved.
         """
-        transaction = PointTransaction(
+        return PointTransaction(
             loyalty_account=loyalty_account,
             product=product,
             points_earned=points_earned,
-            transaction_date=date.today()
+            transaction_date=transaction_date
         )
-        self.transaction_repo.create(transaction)
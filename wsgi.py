@@ -0,0 +1,5 @@
+# wsgi.py
+
+from .loyalty_app import app
+
+__all__ = ['app']